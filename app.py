@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
 import os
 
 from models.energy import PigGrowEnergy
 from models.scale import scale_nutrients
+from models.phases import etapa_por_pv, dias_lote, plan_fases
+from models.sensitivity import VARIABLES, superficie, figura_superficie
 from helpers import energy_unit_convert
 from auth import USERS_DB
 
@@ -13,6 +15,8 @@ from core.ingredients import IngredientInput, get_ingredient_defaults, load_ingr
 from core.selector import select_equation, list_applicable_equations
 from core.equations import compute_energy
 from core.scaling import scale_nutrients as scale_nutrients_ingredientes
+from core.export import FORMATOS, export_buffer
+from core.jobs import JobManager, clave_calculo
 from core.utils import (
     convert_unit,
     check_range,
@@ -56,6 +60,13 @@ if "logged_in" not in st.session_state or not st.session_state["logged_in"]:
 USER_KEY = f"uywa_req_{st.session_state['usuario']}"
 user = st.session_state["user"]
 
+@st.cache_resource
+def get_job_manager():
+    # Un único pool por servidor, compartido entre sesiones y reruns
+    return JobManager(max_trabajadores=2)
+
+jobs = get_job_manager()
+
 # ========================
 # BLOQUE 1: ESTILO CSS
 # ========================
@@ -144,6 +155,19 @@ with st.sidebar:
         unsafe_allow_html=True
     )
 
+    tareas = jobs.jobs(st.session_state["usuario"])
+    if tareas:
+        st.markdown("**Tareas en segundo plano**")
+        for tarea in tareas:
+            st.caption(f"{tarea.nombre}: {tarea.estado} ({tarea.progreso:.0%}) {tarea.mensaje}")
+            if not tarea.terminado and st.button("Cancelar", key=f"cancelar_{tarea.id}"):
+                jobs.cancel(st.session_state["usuario"], tarea.id)
+                st.session_state.setdefault("tareas_canceladas", set()).add(tarea.id)
+                st.rerun()
+        if st.button("Limpiar terminadas", key="limpiar_tareas"):
+            jobs.limpiar(st.session_state["usuario"])
+            st.rerun()
+
 # ========================
 # BLOQUE 3: PESTAÑAS PRINCIPALES
 # ========================
@@ -193,7 +217,6 @@ with tabs[0]:
     AME_requerida_disp = None
     FI = None
     scaled_nutr = None
-    csv_out = None
 
     if etapa == "Crecimiento/Cebo":
         st.markdown('<div class="main-title" style="font-size:1.12em; margin-bottom:0.3em;">Parámetros productivos - Crecimiento/Cebo</div>', unsafe_allow_html=True)
@@ -219,12 +242,7 @@ with tabs[0]:
         AME_requerida_disp = energy_unit_convert(AME_requerida, "kcal", unidad_energia)
 
         # Selección de ETAPA según peso vivo
-        if PV < 60:
-            etapa_nutr = "20-60"
-        elif PV < 100:
-            etapa_nutr = "60-100"
-        else:
-            etapa_nutr = ">100"
+        etapa_nutr = etapa_por_pv(PV)
 
         nutr_stage = nutrients_df[(nutrients_df["especie"] == "porcino") & (nutrients_df["etapa"] == etapa_nutr)].copy()
 
@@ -235,7 +253,6 @@ with tabs[0]:
 
         # Haz el escalamiento:
         scaled_nutr = scale_nutrients(nutr_stage, AME_requerida)
-        csv_out = scaled_nutr.to_csv(index=False).encode()
 
         energia_ref = nutr_stage["referencia_AME_kcalkg"].iloc[0]
         st.caption(f"Energía estándar de referencia para la etapa: {energia_ref} kcal/kg")
@@ -255,22 +272,107 @@ with tabs[0]:
             st.markdown('<div class="card-box">', unsafe_allow_html=True)
             st.markdown('<div class="main-title" style="font-size:1.12em; margin-bottom:0.3em;">Nutrientes escalados por kg de dieta</div>', unsafe_allow_html=True)
             st.dataframe(scaled_nutr[["nutriente", "valor_por_kg", "unidad"]], use_container_width=True)
-            st.download_button("Descargar CSV", data=csv_out, file_name="nutrientes_escalados.csv")
+            formato = st.radio("Formato de descarga", list(FORMATOS), horizontal=True, key="formato_nutr")
+            ext, mime, _ = FORMATOS[formato]
+            st.download_button(
+                f"Descargar {formato}",
+                data=lambda: export_buffer(scaled_nutr, formato),
+                file_name=f"nutrientes_escalados.{ext}",
+                mime=mime,
+            )
             st.markdown('</div>', unsafe_allow_html=True)
 
-        with st.expander("Mostrar sensibilidad de AME requerida vs FI"):
-            fi_range = [x/10 for x in range(10, 40)]
-            ame_range = [ME_total_disp / fi for fi in fi_range]
-            fig = px.line(
-                x=fi_range, y=ame_range,
-                labels={"x": "FI (kg/d)", "y": f"AME requerida ({unidad_energia}/kg)"},
-                title="Sensibilidad de AME requerida según FI",
-                template="simple_white",
-                color_discrete_sequence=["#19345c"]
+        with st.expander("Análisis de sensibilidad"):
+            analisis = {
+                "AME requerida vs FI": ("AME_requerida", ["FI"]),
+                "AME requerida: FI × T_amb": ("AME_requerida", ["FI", "T_amb"]),
+                "ME total: PV × ADG": ("ME_total", ["PV", "ADG"]),
+                "AME requerida: FI × T_amb × PV (3-D)": ("AME_requerida", ["FI", "T_amb", "PV"]),
+            }
+            colsens1, colsens2 = st.columns([2, 1])
+            tipo_sens = colsens1.selectbox("Análisis", list(analisis), key="tipo_sensibilidad")
+            resolucion = colsens2.select_slider("Resolución por eje", [30, 100, 200, 400], value=100, key="resolucion_sens")
+            salida_sens, ejes_sens = analisis[tipo_sens]
+            if len(ejes_sens) == 3:
+                resolucion = min(resolucion, 100)
+            coords, valores = superficie(
+                params,
+                [(v, VARIABLES[v][1], VARIABLES[v][2], resolucion) for v in ejes_sens],
+                dict(PV=PV, ADG=ADG, f_P=f_P, f_G=f_G, T_amb=T_amb, FI=FI),
+                salida_sens,
             )
-            fig.update_layout(font=dict(family="Montserrat, Arial", size=14, color="#19345c"))
+            fig = figura_superficie(coords, valores, ejes_sens, salida_sens, unidad_energia=unidad_energia)
             st.plotly_chart(fig, use_container_width=True)
 
+        with st.expander("Plan de alimentación por fases (optimizado)"):
+            colf1, colf2, colf3, colf4, colf5 = st.columns(5)
+            PV_final = colf1.number_input("PV final (kg)", min_value=PV + 1, value=max(PV + 1, 120.0), key="pv_final_fases")
+            FI_final = colf2.number_input("FI final (kg/d)", min_value=0.1, value=max(FI, 3.0), key="fi_final_fases")
+            max_fases = colf3.number_input("Máx. fases", min_value=1, max_value=12, value=5, key="max_fases")
+            min_dias = colf4.number_input("Mín. días por fase", min_value=1, value=7, key="min_dias_fases")
+            costo_fase = colf5.number_input("Penalización por fase", min_value=0.0, value=5.0, key="costo_fase")
+            # Ingesta lineal entre la FI actual y la final a lo largo del lote
+            FI_curva = np.linspace(FI, FI_final, dias_lote(PV, PV_final, ADG)) if ADG > 0 else FI
+            args_fases = (
+                energy_model, PV, PV_final, ADG, f_P, f_G, T_amb, FI_curva, nutrients_df,
+                max_fases, min_dias, costo_fase,
+            )
+            clave_fases = clave_calculo(plan_fases, args_fases, {})
+            usuario = st.session_state["usuario"]
+            # (clave de entradas, id de tarea) del último plan pedido en esta sesión
+            previa = st.session_state.get("plan_fases_job")
+            tarea = jobs.get(previa[1]) if previa else None
+            if tarea is not None and previa[0] != clave_fases and not tarea.terminado:
+                # Las entradas cambiaron: la tarea anterior ya no sirve
+                jobs.cancel(usuario, tarea.id)
+            if st.button("Calcular plan", key="calcular_fases"):
+                tarea = jobs.submit(usuario, plan_fases, *args_fases, nombre="Plan de fases")
+                if previa and previa[1] != tarea.id:
+                    # Libera el plan anterior (en curso o ya terminado) en el pool compartido
+                    jobs.cancel(usuario, previa[1])
+                previa = st.session_state["plan_fases_job"] = (clave_fases, tarea.id)
+
+            @st.fragment(run_every=1.0)
+            def progreso_fases(job_id):
+                tarea = jobs.get(job_id)
+                if tarea is None or tarea.terminado:
+                    st.rerun()
+                st.progress(tarea.progreso, text=tarea.mensaje or "En cola")
+                if st.button("Cancelar", key="cancelar_fases"):
+                    jobs.cancel(usuario, job_id)
+                    st.session_state.setdefault("tareas_canceladas", set()).add(job_id)
+                    st.rerun()
+
+            tarea = jobs.get(previa[1]) if previa else None
+            if tarea is not None and usuario not in tarea.usuarios:
+                tarea = None  # el usuario la dejó (otro usuario aún la comparte)
+            if previa is None:
+                st.caption("Ajuste los parámetros y pulse «Calcular plan».")
+            elif previa[0] != clave_fases:
+                st.info("Las entradas cambiaron. Pulse «Calcular plan» para recalcular.")
+            elif previa[1] in st.session_state.get("tareas_canceladas", set()):
+                st.info("Optimización cancelada.")
+            elif tarea is None:
+                st.info("El plan ya no está disponible (se limpió de las tareas terminadas). Pulse «Calcular plan».")
+            elif tarea.estado in ("cancelado", "cancelando"):
+                st.info("Optimización cancelada.")
+            elif not tarea.terminado:
+                progreso_fases(tarea.id)
+            elif tarea.estado == "completado":
+                plan = tarea.resultado()
+                st.caption(f"{plan['n_fases']} fases | exceso relativo de nutrientes: {plan['exceso']:.2f}")
+                st.dataframe(plan["fases"], use_container_width=True)
+                formato_fases = st.radio("Formato de descarga", list(FORMATOS), horizontal=True, key="formato_fases")
+                ext_fases, mime_fases, _ = FORMATOS[formato_fases]
+                st.download_button(
+                    f"Descargar plan de fases ({formato_fases})",
+                    data=lambda: export_buffer(plan["fases"], formato_fases),
+                    file_name=f"plan_fases.{ext_fases}",
+                    mime=mime_fases,
+                )
+            else:
+                st.error(f"No se pudo optimizar el plan de fases: {tarea.error()}")
+
         if AME_requerida_disp > 3600 and isinstance(AME_requerida_disp, (int, float)):
             st.warning("AME requerida excede el rango típico para esta etapa. Revisar parámetros o FI.")
         if FI < 0.5:
@@ -407,7 +509,14 @@ except Exception as e:
     st.dataframe(out_df)
 
     # ------ BLOQUE 2.6: Descarga y log ------
-    st.download_button("Descargar resultados (CSV)", data=out_df.to_csv(index=False).encode(), file_name="ajuste_nutrientes.csv")
+    formato_mp = st.radio("Formato de descarga", list(FORMATOS), horizontal=True, key="formato_mp")
+    ext_mp, mime_mp, _ = FORMATOS[formato_mp]
+    st.download_button(
+        f"Descargar resultados ({formato_mp})",
+        data=lambda: export_buffer(out_df, formato_mp),
+        file_name=f"ajuste_nutrientes.{ext_mp}",
+        mime=mime_mp,
+    )
     with st.expander("Log de decisiones y advertencias"):
         st.write({
             "ecuacion_usada": ecuacion_usada,
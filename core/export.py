@@ -0,0 +1,208 @@
+import io
+from typing import Dict, Iterable, Iterator, Optional, Union
+
+import pandas as pd
+
+# Unidades por defecto de las columnas que producen los modelos.
+# Se guardan como metadata de campo ("unidad") en los esquemas Arrow/Parquet.
+UNIDADES = {
+    "dia": "d",
+    "PV": "kg",
+    "PV_inicio": "kg",
+    "PV_fin": "kg",
+    "FI": "kg/d",
+    "FI_total": "kg",
+    "ADG": "g/d",
+    "T_amb": "°C",
+    "ME_total": "kcal/d",
+    "AME_requerida": "kcal/kg",
+    "AME requerida": "kcal/kg",
+    "referencia_AME_kcalkg": "kcal/kg",
+}
+
+Frames = Union[pd.DataFrame, Iterable[pd.DataFrame]]
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Se requiere 'pyarrow' para exportar a Parquet/Arrow.") from e
+    return pa
+
+
+def iter_frames(data: Frames, chunk_rows: int = 100_000) -> Iterator[pd.DataFrame]:
+    """
+    Recorre un DataFrame en bloques de chunk_rows filas, o un iterable de DataFrames
+    tal cual (p. ej. resultados de un lote generados barrida a barrida).
+    """
+    if isinstance(data, pd.DataFrame):
+        if data.empty:
+            yield data
+            return
+        for inicio in range(0, len(data), chunk_rows):
+            yield data.iloc[inicio:inicio + chunk_rows]
+    else:
+        yield from data
+
+
+def iter_csv_chunks(data: Frames, chunk_rows: int = 100_000, encoding: str = "utf-8") -> Iterator[bytes]:
+    """CSV en bloques de bytes (cabecera solo en el primero), sin construir el archivo completo."""
+    cabecera = True
+    for frame in iter_frames(data, chunk_rows):
+        yield frame.to_csv(index=False, header=cabecera).encode(encoding)
+        cabecera = False
+
+
+def write_csv(data: Frames, sink, chunk_rows: int = 100_000) -> None:
+    """Escribe CSV por bloques en un archivo binario abierto o una ruta. ValueError si no hay bloques."""
+    bloques = iter_csv_chunks(data, chunk_rows)
+    primero = next(bloques, None)
+    if primero is None:
+        raise ValueError("No hay datos para exportar (iterable de DataFrames vacío).")
+    if isinstance(sink, (str, bytes)) or hasattr(sink, "__fspath__"):
+        with open(sink, "wb") as f:
+            f.write(primero)
+            for bloque in bloques:
+                f.write(bloque)
+        return
+    sink.write(primero)
+    for bloque in bloques:
+        sink.write(bloque)
+
+
+def arrow_schema(frame: pd.DataFrame, unidades: Optional[Dict[str, str]] = None):
+    """Esquema Arrow tipado del DataFrame con la unidad de cada columna como metadata."""
+    pa = _pyarrow()
+    return con_unidades(pa.Schema.from_pandas(frame, preserve_index=False), unidades)
+
+
+def con_unidades(schema, unidades: Optional[Dict[str, str]] = None):
+    """Añade la metadata "unidad" a los campos del esquema que aún no la tienen."""
+    pa = _pyarrow()
+    unidades = {**UNIDADES, **(unidades or {})}
+    campos = []
+    for campo in schema:
+        unidad = unidades.get(campo.name)
+        tiene = campo.metadata and b"unidad" in campo.metadata
+        campos.append(campo.with_metadata({**(campo.metadata or {}), "unidad": unidad}) if unidad and not tiene else campo)
+    return pa.schema(campos, metadata=schema.metadata)
+
+
+def _tablas(data: Frames, chunk_rows: int, unidades: Optional[Dict[str, str]], schema=None):
+    """
+    Bloques como tablas Arrow con un esquema único. Orden de prioridad del esquema:
+    el explícito (schema=), el del DataFrame completo, o el del primer bloque de un
+    iterable. Un bloque que no encaja (p. ej. float en columna int, texto en columna
+    toda nula del primer bloque) produce ValueError: pase schema= para esos casos.
+    """
+    pa = _pyarrow()
+    if schema is not None:
+        schema = con_unidades(schema, unidades)
+    elif isinstance(data, pd.DataFrame):
+        schema = arrow_schema(data, unidades)
+    for num, frame in enumerate(iter_frames(data, chunk_rows)):
+        if schema is None:
+            schema = arrow_schema(frame, unidades)
+        try:
+            yield pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError, KeyError) as e:
+            raise ValueError(
+                f"El bloque {num} no es compatible con el esquema del archivo ({e}). "
+                "Pase schema= con los tipos definitivos de cada columna."
+            ) from e
+
+
+def write_parquet(
+    data: Frames,
+    sink,
+    unidades: Optional[Dict[str, str]] = None,
+    chunk_rows: int = 100_000,
+    compression: str = "zstd",
+    schema=None,
+) -> None:
+    """
+    Escribe Parquet por grupos de filas (un bloque en memoria a la vez).
+    schema (pa.Schema) fija los tipos para iterables con tipos variables entre bloques.
+    ValueError si no hay bloques o un bloque no encaja en el esquema.
+    """
+    pq = _pyarrow().parquet
+    writer = None
+    try:
+        for tabla in _tablas(data, chunk_rows, unidades, schema):
+            if writer is None:
+                writer = pq.ParquetWriter(sink, tabla.schema, compression=compression)
+            writer.write_table(tabla)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError("No hay datos para exportar (iterable de DataFrames vacío).")
+
+
+def write_arrow_ipc(
+    data: Frames,
+    sink,
+    unidades: Optional[Dict[str, str]] = None,
+    chunk_rows: int = 100_000,
+    schema=None,
+) -> None:
+    """
+    Escribe Arrow IPC (formato archivo, .arrow/.feather v2) por lotes.
+    schema y errores como en write_parquet.
+    """
+    pa = _pyarrow()
+    writer = None
+    try:
+        for tabla in _tablas(data, chunk_rows, unidades, schema):
+            if writer is None:
+                writer = pa.ipc.new_file(sink, tabla.schema)
+            writer.write_table(tabla)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError("No hay datos para exportar (iterable de DataFrames vacío).")
+
+
+def read_arrow_ipc(path: str):
+    """Carga un archivo Arrow IPC mapeado en memoria (sin copia de los buffers)."""
+    pa = _pyarrow()
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def read_parquet(path: str, columns=None):
+    """Carga Parquet como tabla Arrow, con lectura mapeada en memoria."""
+    return _pyarrow().parquet.read_table(path, columns=columns, memory_map=True)
+
+
+def unidades_de_schema(schema) -> Dict[str, str]:
+    """Recupera {columna: unidad} de la metadata de un esquema Arrow/Parquet."""
+    return {
+        campo.name: campo.metadata[b"unidad"].decode()
+        for campo in schema
+        if campo.metadata and b"unidad" in campo.metadata
+    }
+
+
+FORMATOS = {
+    "CSV": ("csv", "text/csv", write_csv),
+    "Parquet": ("parquet", "application/vnd.apache.parquet", write_parquet),
+    "Arrow": ("arrow", "application/vnd.apache.arrow.file", write_arrow_ipc),
+}
+
+
+def export_buffer(data: Frames, formato: str = "CSV") -> io.BytesIO:
+    """
+    Escribe en un buffer con el escritor por bloques del formato y lo deja rebobinado.
+    En la app se pasa como callable a st.download_button (data=lambda: export_buffer(...))
+    para que solo se genere al pulsar el botón.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}")
+    buf = io.BytesIO()
+    FORMATOS[formato][2](data, buf)
+    buf.seek(0)
+    return buf
@@ -0,0 +1,170 @@
+import hashlib
+import inspect
+import itertools
+import pickle
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+class TareaCancelada(Exception):
+    """Se lanza desde el callback de progreso cuando la tarea fue cancelada."""
+
+
+class Job:
+    """
+    Tarea en segundo plano. Varios usuarios pueden compartir la misma tarea
+    si enviaron exactamente el mismo cálculo (misma clave).
+    """
+    def __init__(self, job_id: str, nombre: str, clave: Optional[str]):
+        self.id = job_id
+        self.nombre = nombre
+        self.clave = clave
+        self.usuarios = set()
+        self.creado = time.time()
+        self.progreso = 0.0
+        self.mensaje = ""
+        self.future: Optional[Future] = None
+        self._cancelar = threading.Event()
+
+    @property
+    def estado(self) -> str:
+        f = self.future
+        if f is None or not f.done():
+            if self._cancelar.is_set():
+                return "cancelando"
+            return "en curso" if f is not None and f.running() else "pendiente"
+        if f.cancelled() or isinstance(f.exception(), TareaCancelada):
+            return "cancelado"
+        return "error" if f.exception() is not None else "completado"
+
+    @property
+    def terminado(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    def resultado(self, timeout: Optional[float] = None):
+        """Resultado de la tarea (bloquea hasta timeout). Relanza el error si falló."""
+        return self.future.result(timeout)
+
+    def error(self) -> Optional[BaseException]:
+        if not self.terminado or self.future.cancelled():
+            return None
+        return self.future.exception()
+
+    def reportar(self, fraccion: float, mensaje: str = "") -> None:
+        """Callback de progreso que recibe la función; interrumpe si se canceló."""
+        if self._cancelar.is_set():
+            raise TareaCancelada(self.nombre)
+        self.progreso = min(max(float(fraccion), 0.0), 1.0)
+        self.mensaje = mensaje
+
+
+def clave_calculo(func: Callable, args: tuple, kwargs: dict) -> Optional[str]:
+    """Huella de (función, argumentos). None si los argumentos no son serializables."""
+    try:
+        datos = pickle.dumps((func.__module__, func.__qualname__, args, sorted(kwargs.items())))
+    except Exception:
+        return None
+    return hashlib.sha256(datos).hexdigest()
+
+
+class JobManager:
+    """
+    Pool local de tareas para no bloquear el hilo del script de Streamlit.
+
+    - Tareas registradas por usuario (st.session_state["usuario"]).
+    - Cálculos idénticos en curso (o ya completados y no descartados) se comparten.
+    - Con hilos (por defecto), si la función acepta un parámetro `progreso`,
+      recibe Job.reportar para informar avance y detectar la cancelación.
+      Con procesos (usar_procesos=True) la función debe ser serializable y solo
+      se puede cancelar antes de que empiece.
+    """
+    def __init__(self, max_trabajadores: int = 2, usar_procesos: bool = False):
+        self.usar_procesos = usar_procesos
+        pool = ProcessPoolExecutor if usar_procesos else ThreadPoolExecutor
+        self._executor = pool(max_workers=max_trabajadores)
+        self._jobs: Dict[str, Job] = {}
+        self._por_clave: Dict[str, Job] = {}
+        self._lock = threading.RLock()  # los callbacks de fin pueden correr dentro del lock
+        self._ids = itertools.count(1)
+
+    def submit(self, usuario: str, func: Callable, *args, nombre: Optional[str] = None, **kwargs) -> Job:
+        clave = clave_calculo(func, args, kwargs)
+        with self._lock:
+            job = self._por_clave.get(clave) if clave else None
+            if job is not None and job.estado not in ("cancelado", "cancelando", "error"):
+                job.usuarios.add(usuario)
+                return job
+
+            job = Job(f"job-{next(self._ids)}", nombre or func.__name__, clave)
+            job.usuarios.add(usuario)
+            if not self.usar_procesos and "progreso" in _parametros(func):
+                kwargs = {**kwargs, "progreso": job.reportar}
+            job.future = self._executor.submit(func, *args, **kwargs)
+            self._jobs[job.id] = job
+            if clave:
+                self._por_clave[clave] = job
+            job.future.add_done_callback(lambda f, job=job: self._marcar_fin(job, f))
+            return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def jobs(self, usuario: str) -> List[Job]:
+        with self._lock:
+            return sorted((j for j in self._jobs.values() if usuario in j.usuarios), key=lambda j: j.creado)
+
+    def cancel(self, usuario: str, job_id: str) -> bool:
+        """
+        Retira la tarea del usuario. Solo se detiene de verdad cuando ningún otro
+        usuario la comparte; si ya terminó, se descarta su resultado cuando nadie
+        más la tiene. Devuelve True si la tarea quedó cancelada o cancelándose.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or usuario not in job.usuarios:
+                return False
+            job.usuarios.discard(usuario)
+            if job.usuarios or job.terminado:
+                if not job.usuarios:
+                    self._olvidar(job)
+                return False
+            job._cancelar.set()
+            if job.future.cancel():
+                self._olvidar(job)
+            return True
+
+    def limpiar(self, usuario: str) -> None:
+        """Descarta las tareas terminadas del usuario (libera sus resultados)."""
+        with self._lock:
+            for job in [j for j in self._jobs.values() if usuario in j.usuarios and j.terminado]:
+                job.usuarios.discard(usuario)
+                if not job.usuarios:
+                    self._olvidar(job)
+
+    def shutdown(self, wait: bool = False) -> None:
+        for job in list(self._jobs.values()):
+            job._cancelar.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _marcar_fin(self, job: Job, future: Future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            job.progreso = 1.0
+        with self._lock:
+            # Cancelada mientras corría: nadie la espera, no se guarda el resultado
+            if not job.usuarios:
+                self._olvidar(job)
+
+    def _olvidar(self, job: Job) -> None:
+        self._jobs.pop(job.id, None)
+        if job.clave and self._por_clave.get(job.clave) is job:
+            del self._por_clave[job.clave]
+
+
+def _parametros(func: Callable) -> Dict[str, Any]:
+    try:
+        return inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return {}
+
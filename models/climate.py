@@ -0,0 +1,52 @@
+import numpy as np
+
+
+def abrir_registro(path: str, n_granjas: int = None, dtype: str = "float32"):
+    """
+    Abre un registro de temperatura (°C) mapeado en memoria, sin cargarlo.
+    Forma (n_muestras, n_granjas): una fila por lectura, una columna por granja.
+    .npy se abre con np.load(mmap_mode="r"); cualquier otro archivo se trata como
+    binario crudo de `dtype` y requiere n_granjas.
+    """
+    if str(path).endswith(".npy"):
+        T = np.load(path, mmap_mode="r")
+    else:
+        if not n_granjas:
+            raise ValueError("Se requiere n_granjas para registros binarios crudos.")
+        T = np.memmap(path, dtype=dtype, mode="r").reshape(-1, n_granjas)
+    if T.ndim == 1:
+        T = T.reshape(-1, 1)
+    return T
+
+
+def deficit_termico_diario(T, TCI, muestras_por_dia: int, dias_por_bloque: int = 7):
+    """
+    Promedio diario de max(0, TCI − T) en °C por granja, a partir de lecturas regulares.
+    T: array (n_muestras, n_granjas), puede ser un memmap; se recorre por bloques de
+    días para acotar la memoria. TCI: escalar o array (n_granjas,).
+    Las lecturas NaN (huecos del registro) se ignoran; un día sin lecturas da NaN.
+    El último día puede estar incompleto y se promedia con las lecturas disponibles.
+    Devuelve array (n_dias, n_granjas).
+    """
+    if T.ndim == 1:
+        T = T.reshape(-1, 1)
+    n_muestras, n_granjas = T.shape
+    m = int(muestras_por_dia)
+    if m <= 0:
+        raise ValueError("muestras_por_dia debe ser > 0.")
+    TCI = np.asarray(TCI, dtype=np.float64)
+    n_dias = -(-n_muestras // m)
+    out = np.empty((n_dias, n_granjas))
+
+    for d0 in range(0, n_dias, dias_por_bloque):
+        d1 = min(d0 + dias_por_bloque, n_dias)
+        bloque = np.asarray(T[d0 * m:d1 * m], dtype=np.float64)
+        faltan = (d1 - d0) * m - len(bloque)
+        if faltan:
+            bloque = np.concatenate([bloque, np.full((faltan, n_granjas), np.nan)])
+        deficit = np.maximum(0.0, TCI - bloque.reshape(d1 - d0, m, n_granjas))
+        validas = ~np.isnan(deficit)
+        n = validas.sum(axis=1)
+        suma = np.where(validas, deficit, 0.0).sum(axis=1)
+        out[d0:d1] = np.divide(suma, n, out=np.full(suma.shape, np.nan), where=n > 0)
+    return out
@@ -2,6 +2,7 @@ import numpy as np
 import pandas as pd
 
 from helpers import energy_unit_convert
+from models.climate import deficit_termico_diario
 
 class PigGrowEnergy:
     """
@@ -19,7 +20,18 @@ class PigGrowEnergy:
 
     def me_term(self, s_cat, TCI, T_amb):
         """Térmica: ME_term = s_cat * max(0, TCI − T_amb)"""
-        return s_cat * max(0, TCI - T_amb)
+        return s_cat * np.maximum(0, TCI - T_amb)
+
+    def me_term_registro(self, T_log, muestras_por_dia, TCI=None, dias_por_bloque=7):
+        """
+        Térmica diaria desde registros de temperatura de alta resolución:
+        ME_term_dia = s_cat * media_dia(max(0, TCI − T)), integrada lectura a lectura
+        (las noches frías cuentan aunque la media diaria esté sobre TCI).
+        T_log: (n_muestras, n_granjas), p. ej. models.climate.abrir_registro(...).
+        Devuelve array (n_dias, n_granjas) en kcal/día.
+        """
+        TCI = TCI if TCI is not None else self.params["TCI_base"]
+        return self.params["s_cat"] * deficit_termico_diario(T_log, TCI, muestras_por_dia, dias_por_bloque)
 
     def me_growth(self, ADG, f_P, f_G, e_P, e_G, k_P, k_G):
         """
@@ -33,7 +45,11 @@ class PigGrowEnergy:
         RE_G = gG * e_G
         return (RE_P / k_P) + (RE_G / k_G)
 
-    def me_total(self, PV, ADG, f_P, f_G, T_amb, TCI=None):
+    def me_total(self, PV, ADG, f_P, f_G, T_amb, TCI=None, ME_term=None):
+        """
+        ME total (kcal/día). Si se da ME_term (p. ej. de me_term_registro),
+        se usa en lugar de la térmica calculada con T_amb.
+        """
         a_cat = self.params["a_cat"]
         b = self.params["b"]
         s_cat = self.params["s_cat"]
@@ -44,7 +60,7 @@ class PigGrowEnergy:
         k_G = self.params["k_G"]
 
         me_mto = self.me_mto(PV, a_cat, b)
-        me_term = self.me_term(s_cat, TCI, T_amb)
+        me_term = ME_term if ME_term is not None else self.me_term(s_cat, TCI, T_amb)
         me_crec = self.me_growth(ADG, f_P, f_G, e_P, e_G, k_P, k_G)
         # ME_act: opcional, aquí 0 por defecto.
         me_act = 0
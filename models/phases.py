@@ -0,0 +1,223 @@
+import numpy as np
+import pandas as pd
+
+from models.scale import scale_nutrients_matrix
+
+# La DP guarda matrices (días × días); por encima de este largo se rechaza la curva
+MAX_DIAS = 1000
+
+
+def etapa_por_pv(PV):
+    """
+    Etapa de la tabla de requerimientos según peso vivo (corte <60 / <100 / >=100 kg).
+    Acepta escalar (devuelve str) o array (devuelve array de str).
+    """
+    PV = np.asarray(PV, dtype=float)
+    etapas = np.select([PV < 60, PV < 100], ["20-60", "60-100"], ">100")
+    return etapas.item() if etapas.ndim == 0 else etapas
+
+
+def dias_lote(PV_inicial, PV_final, ADG):
+    """Número de días para ir de PV_inicial a PV_final (kg) con ADG constante (g/d)."""
+    if ADG <= 0 or PV_final <= PV_inicial:
+        raise ValueError("Se requiere ADG > 0 y PV_final > PV_inicial.")
+    return int(np.ceil((PV_final - PV_inicial) * 1000 / ADG))
+
+
+def curva_diaria(energy_model, PV_inicial, PV_final, ADG, f_P, f_G, T_amb, FI, ME_term=None, dia_inicio=None):
+    """
+    Simula la curva diaria de requerimientos desde PV_inicial hasta PV_final (kg).
+    ADG en g/d (constante). T_amb (°C) y FI (kg/d) pueden ser escalares o arrays por día.
+    ME_term (kcal/d por día, p. ej. una columna de me_term_registro) sustituye a la
+    térmica calculada con T_amb. Sin dia_inicio debe tener exactamente un valor por
+    día del lote; con dia_inicio es la serie completa del registro y se toman los días
+    dia_inicio .. dia_inicio + n_dias - 1 (día del registro en que entra el lote).
+    Días sin dato (NaN) se rechazan con ValueError.
+    Devuelve DataFrame con: dia, PV, FI, ME_total (kcal/d), AME_requerida (kcal/kg).
+    """
+    n_dias = dias_lote(PV_inicial, PV_final, ADG)
+    dias = np.arange(n_dias)
+    PV = PV_inicial + dias * ADG / 1000
+    T_amb = _por_dia(T_amb, n_dias, "T_amb")
+    FI = _por_dia(FI, n_dias, "FI")
+    if np.any(FI <= 0):
+        raise ValueError("FI debe ser > 0 en todos los días.")
+
+    if ME_term is not None:
+        ME_term = np.asarray(ME_term, dtype=float)
+        if dia_inicio is not None:
+            if ME_term.ndim != 1 or dia_inicio < 0 or dia_inicio + n_dias > len(ME_term):
+                raise ValueError(
+                    f"ME_term debe cubrir los días {dia_inicio}..{dia_inicio + n_dias - 1} del registro "
+                    f"(tiene {ME_term.size} días)."
+                )
+            ME_term = ME_term[dia_inicio:dia_inicio + n_dias]
+        ME_term = _por_dia(ME_term, n_dias, "ME_term")
+        sin_dato = np.flatnonzero(~np.isfinite(ME_term))
+        if len(sin_dato):
+            raise ValueError(f"ME_term sin dato (NaN) en los días {sin_dato.tolist()}; complete el registro de temperatura.")
+
+    ME_total = energy_model.me_total(PV, ADG, f_P, f_G, T_amb, ME_term=ME_term)
+    return pd.DataFrame({
+        "dia": dias,
+        "PV": PV,
+        "FI": FI,
+        "ME_total": ME_total,
+        "AME_requerida": ME_total / FI,
+    })
+
+
+def _por_dia(valor, n_dias, nombre):
+    arr = np.asarray(valor, dtype=float)
+    if arr.ndim == 0:
+        return np.full(n_dias, float(arr))
+    if arr.shape != (n_dias,):
+        raise ValueError(f"{nombre} debe ser escalar o tener {n_dias} valores (uno por día).")
+    return arr
+
+
+def requerimientos_diarios(curva, nutrients_df, especie="porcino"):
+    """
+    Requerimiento diario por kg de dieta (días × nutrientes) a partir de la curva.
+    Cada día usa la tabla de su etapa (etapa_por_pv) escalada a su AME_requerida.
+    La primera columna es "AME requerida" (kcal/kg).
+    """
+    nutr = nutrients_df[nutrients_df["especie"] == especie].copy()
+    nutr["escalable"] = nutr["escalable"].astype(str).str.lower().map({"true": True, "false": False})
+    nombres = list(dict.fromkeys(nutr["nutriente"]))
+
+    etapas = etapa_por_pv(curva["PV"].to_numpy())
+    AME = curva["AME_requerida"].to_numpy(dtype=float)
+    req = np.full((len(curva), len(nombres)), np.nan)
+    for etapa in np.unique(etapas):
+        tabla = nutr[nutr["etapa"] == etapa].drop_duplicates("nutriente").set_index("nutriente")
+        if tabla.empty:
+            raise ValueError(f"No hay requerimientos para la etapa '{etapa}'.")
+        tabla = tabla.reindex(nombres)
+        mask = etapas == etapa
+        req[mask] = scale_nutrients_matrix(tabla, AME[mask])
+
+    req_df = pd.DataFrame(req, columns=nombres, index=curva.index)
+    req_df.insert(0, "AME requerida", AME)
+    return req_df
+
+
+def optimizar_fases(curva, req_df, max_fases=6, min_dias=7, costo_fase=0.0, precios=None):
+    """
+    Elige número, duración y especificación de las fases de alimentación.
+
+    Cada fase cubre días consecutivos y se formula al máximo requerimiento de sus
+    días (nunca hay déficit). Se minimiza el exceso de nutrientes suministrado
+        sum_d FI_d * (spec_fase - req_d) · w  +  costo_fase * n_fases
+    - Con precios ({nutriente: costo por unidad de nutriente y kg de pienso}), w son
+      esos precios: el exceso es el sobrecosto de pienso y costo_pienso el costo total
+      de los nutrientes suministrados, en la misma moneda.
+    - Sin precios, w = 1 / media del requerimiento: se minimiza el exceso relativo
+      (adimensional, todos los nutrientes pesan igual) y costo_pienso es None.
+    costo_fase está en las mismas unidades que el exceso.
+
+    Programación dinámica sobre los límites de fase: el costo de los segmentos se
+    calcula por día de inicio con un máximo acumulado (memoria días × nutrientes) y
+    la recurrencia por número de fases es un mínimo matricial (días × días), así que
+    un lote típico (~150 días) se resuelve en milisegundos. Curvas de más de
+    MAX_DIAS días se rechazan con ValueError.
+
+    Devuelve dict:
+      {'fases': DataFrame, 'n_fases': int, 'exceso': float, 'costo_pienso': float | None}
+    """
+    R = req_df.to_numpy(dtype=float)
+    FI = curva["FI"].to_numpy(dtype=float)
+    PV = curva["PV"].to_numpy(dtype=float)
+    n_dias = len(R)
+    if n_dias == 0:
+        raise ValueError("La curva de requerimientos está vacía.")
+    if n_dias > MAX_DIAS:
+        raise ValueError(f"La curva tiene {n_dias} días; el máximo para optimizar fases es {MAX_DIAS}.")
+    min_dias = max(1, int(min_dias))
+    max_fases = max(1, min(int(max_fases), n_dias // min_dias))
+
+    # Nutrientes sin dato en algún día no participan en la optimización
+    R = np.nan_to_num(R, nan=0.0)
+    if precios is None:
+        media = R.mean(axis=0)
+        w = np.divide(1.0, media, out=np.zeros_like(media), where=media > 0)
+    else:
+        w = np.array([float(precios.get(c, 0.0)) for c in req_df.columns])
+
+    # costo_spec[i, j] = max(R[i..j]) · w para j >= i, una fila por día de inicio
+    dia = np.arange(n_dias)
+    valido = dia[None, :] >= dia[:, None]
+    costo_spec = np.zeros((n_dias, n_dias))
+    for i in range(n_dias):
+        costo_spec[i, i:] = np.maximum.accumulate(R[i:], axis=0) @ w
+
+    # Exceso del segmento [i, j]: (spec·w) * sum FI - sum FI * (R·w)
+    F = np.concatenate([[0.0], np.cumsum(FI)])
+    G = np.concatenate([[0.0], np.cumsum(FI * (R @ w))])
+    fi_seg = F[None, 1:] - F[:-1, None]
+    exceso_seg = costo_spec * fi_seg - (G[None, 1:] - G[:-1, None])
+
+    # costo[a, b]: fase que ocupa los días a..b-1 (límites 0..n_dias)
+    costo = np.full((n_dias + 1, n_dias + 1), np.inf)
+    largo = dia[None, :] - dia[:, None] + 1
+    costo[:-1, 1:] = np.where(valido & (largo >= min_dias), exceso_seg, np.inf)
+
+    mejor = np.full(n_dias + 1, np.inf)
+    mejor[0] = 0.0
+    origen = np.zeros((max_fases + 1, n_dias + 1), dtype=int)
+    total_por_k = np.full(max_fases + 1, np.inf)
+    for k in range(1, max_fases + 1):
+        cand = mejor[:, None] + costo
+        origen[k] = cand.argmin(axis=0)
+        mejor = cand.min(axis=0)
+        total_por_k[k] = mejor[n_dias] + costo_fase * k
+    if not np.isfinite(total_por_k).any():
+        raise ValueError(f"No hay plan factible con fases de al menos {min_dias} días.")
+    n_fases = int(np.argmin(total_por_k))
+
+    # Reconstrucción de límites de fase
+    limites = [n_dias]
+    for k in range(n_fases, 0, -1):
+        limites.append(int(origen[k][limites[-1]]))
+    limites = limites[::-1]
+
+    filas = []
+    for num, (a, b) in enumerate(zip(limites[:-1], limites[1:]), start=1):
+        fila = {
+            "fase": num,
+            "dia_inicio": int(dia[a]),
+            "dia_fin": int(dia[b - 1]),
+            "dias": b - a,
+            "PV_inicio": PV[a],
+            "PV_fin": PV[b - 1],
+            "FI_total": FI[a:b].sum(),
+        }
+        fila.update(dict(zip(req_df.columns, req_df.iloc[a:b].max(axis=0))))
+        filas.append(fila)
+    fases = pd.DataFrame(filas)
+
+    inicio, fin = np.array(limites[:-1]), np.array(limites[1:]) - 1
+    return dict(
+        fases=fases,
+        n_fases=n_fases,
+        exceso=float(total_por_k[n_fases] - costo_fase * n_fases),
+        costo_pienso=float((costo_spec[inicio, fin] * fi_seg[inicio, fin]).sum()) if precios is not None else None,
+    )
+
+
+def plan_fases(energy_model, PV_inicial, PV_final, ADG, f_P, f_G, T_amb, FI,
+               nutrients_df, max_fases=6, min_dias=7, costo_fase=0.0, precios=None, progreso=None,
+               ME_term=None, dia_inicio=None):
+    """
+    Curva diaria + requerimientos + optimización en una sola llamada.
+    progreso(fraccion, mensaje) es opcional (lo usa core.jobs para tareas en segundo plano).
+    """
+    progreso = progreso or (lambda fraccion, mensaje="": None)
+    progreso(0.0, "Simulando curva diaria")
+    curva = curva_diaria(energy_model, PV_inicial, PV_final, ADG, f_P, f_G, T_amb, FI, ME_term, dia_inicio)
+    progreso(0.3, "Escalando requerimientos")
+    req_df = requerimientos_diarios(curva, nutrients_df)
+    progreso(0.6, "Optimizando fases")
+    plan = optimizar_fases(curva, req_df, max_fases, min_dias, costo_fase, precios)
+    progreso(1.0, "Listo")
+    return plan
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 def scale_nutrients(nutr_df, AME_requerida, AME_base_col="referencia_AME_kcalkg"):
@@ -28,3 +29,33 @@ def scale_nutrients(nutr_df, AME_requerida, AME_base_col="referencia_AME_kcalkg"
             else:
                 nutr_df.at[idx, "valor_por_kg"] = base
     return nutr_df
+
+
+def _columna_o_nan(df, col):
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+
+
+def scale_nutrients_matrix(nutr_df, AME_requerida, AME_base_col="referencia_AME_kcalkg"):
+    """
+    Versión vectorizada de scale_nutrients para muchas energías a la vez.
+    AME_requerida: array (n_dias,) en kcal/kg.
+    Devuelve un array (n_dias, n_nutrientes) con el valor_por_kg escalado,
+    con las mismas reglas (escalable, min_absoluto, max) que scale_nutrients.
+    """
+    AME = np.atleast_1d(np.asarray(AME_requerida, dtype=float))[:, None]
+    base = pd.to_numeric(nutr_df["valor_por_kg"], errors="coerce").to_numpy(dtype=float)
+    ref = pd.to_numeric(nutr_df[AME_base_col], errors="coerce").to_numpy(dtype=float)
+    escalable = (nutr_df["escalable"] == True).to_numpy()  # noqa: E712 (admite object/bool)
+    min_abs = _columna_o_nan(nutr_df, "min_absoluto")
+    max_abs = _columna_o_nan(nutr_df, "max")
+
+    sin_ref = np.isnan(ref) | (ref == 0)
+    factor = np.where(escalable & ~sin_ref, AME / np.where(sin_ref, 1.0, ref), 1.0)
+    valores = base * factor
+    # Mínimo absoluto: aplica a todos los nutrientes con referencia energética
+    valores = np.where(~sin_ref & ~np.isnan(min_abs), np.maximum(valores, min_abs), valores)
+    # Máximo: solo a los escalables (igual que scale_nutrients)
+    valores = np.where(escalable & ~sin_ref & ~np.isnan(max_abs), np.minimum(valores, max_abs), valores)
+    return valores
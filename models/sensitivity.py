@@ -0,0 +1,147 @@
+from functools import lru_cache
+
+import numpy as np
+
+from models.energy import PigGrowEnergy
+
+# Variables que pueden variar en una superficie y rangos por defecto (min, max)
+VARIABLES = {
+    "PV": ("Peso vivo (kg)", 20.0, 130.0),
+    "ADG": ("Ganancia diaria (g/d)", 300.0, 1200.0),
+    "f_P": ("Fracción proteica (f_P)", 0.10, 0.25),
+    "f_G": ("Fracción grasa (f_G)", 0.05, 0.35),
+    "T_amb": ("Temperatura ambiente (°C)", 0.0, 35.0),
+    "FI": ("Ingesta diaria (kg/d)", 1.0, 4.0),
+}
+SALIDAS = {
+    "ME_total": "ME total (kcal/d)",
+    "AME_requerida": "AME requerida (kcal/kg)",
+}
+
+
+def superficie(params: dict, ejes, fijos: dict, salida: str = "AME_requerida"):
+    """
+    Superficie de sensibilidad de 1 a 3 dimensiones, vectorizada con NumPy.
+    params: coeficientes de PigGrowEnergy (fila de params/pig_grow.csv).
+    ejes: secuencia de (variable, min, max, n_puntos), p. ej. [("FI", 1, 4, 200), ("T_amb", 0, 35, 200)].
+    fijos: valores del resto de variables (PV, ADG, f_P, f_G, T_amb, FI).
+    Devuelve (coords, valores): lista de arrays 1-D por eje y array n1 × n2 (× n3), en kcal.
+    Los resultados se cachean por entradas (los valores fijos de las variables de los
+    ejes no forman parte de la clave); los arrays devueltos son de solo lectura.
+    """
+    ejes = tuple((str(v), float(a), float(b), int(n)) for v, a, b, n in ejes)
+    barridas = {e[0] for e in ejes}
+    fijos = {k: v for k, v in fijos.items() if k not in barridas}
+    cache = _superficie_3d if len(ejes) == 3 else _superficie_2d
+    return cache(_congelar(params), ejes, _congelar(fijos), salida)
+
+
+def _congelar(d: dict):
+    return tuple(sorted((k, float(v)) for k, v in d.items() if _es_numero(v)))
+
+
+def _es_numero(v):
+    try:
+        float(v)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _superficie(params, ejes, fijos, salida):
+    if not 1 <= len(ejes) <= 3:
+        raise ValueError("Se admiten superficies de 1 a 3 ejes.")
+    if salida not in SALIDAS:
+        raise ValueError(f"Salida no soportada: {salida}")
+    nombres = [e[0] for e in ejes]
+    for nombre in nombres:
+        if nombre not in VARIABLES:
+            raise ValueError(f"Variable no soportada: {nombre}")
+    if len(set(nombres)) != len(nombres):
+        raise ValueError("Los ejes deben ser variables distintas.")
+
+    coords = [np.linspace(a, b, n) for _, a, b, n in ejes]
+    malla = dict(zip(nombres, np.meshgrid(*coords, indexing="ij", sparse=True)))
+    x = {**dict(fijos), **malla}
+    faltan = [v for v in VARIABLES if v not in x]
+    if faltan:
+        raise ValueError(f"Faltan valores fijos para: {faltan}")
+
+    modelo = PigGrowEnergy(dict(params))
+    forma = tuple(len(c) for c in coords)
+    valores = np.broadcast_to(modelo.me_total(x["PV"], x["ADG"], x["f_P"], x["f_G"], x["T_amb"]), forma)
+    if salida == "AME_requerida":
+        valores = valores / x["FI"]
+    valores = np.array(np.broadcast_to(valores, forma), dtype=float)
+
+    for arr in coords + [valores]:
+        arr.flags.writeable = False
+    return coords, valores
+
+
+# Cachés de proceso: las superficies 3-D (≈8 MB a 100³) tienen su propio límite
+_superficie_2d = lru_cache(maxsize=16)(_superficie)
+_superficie_3d = lru_cache(maxsize=2)(_superficie)
+
+
+def reducir_malla(coords, valores, max_por_eje: int = 100):
+    """
+    Reduce la malla en el servidor promediando bloques contiguos para que cada eje
+    tenga como máximo max_por_eje puntos (conserva la forma general de la superficie).
+    """
+    coords_out = []
+    for eje, c in enumerate(coords):
+        factor = int(np.ceil(len(c) / max_por_eje))
+        if factor <= 1:
+            coords_out.append(c)
+            continue
+        valores = _promedio_bloques(valores, eje, factor)
+        coords_out.append(_promedio_bloques(c, 0, factor))
+    return coords_out, valores
+
+
+def _promedio_bloques(arr, eje, factor):
+    arr = np.moveaxis(np.asarray(arr, dtype=float), eje, 0)
+    n = arr.shape[0]
+    relleno = (-n) % factor
+    if relleno:
+        pad = np.full((relleno,) + arr.shape[1:], np.nan)
+        arr = np.concatenate([arr, pad], axis=0)
+    arr = arr.reshape((-1, factor) + arr.shape[1:])
+    return np.moveaxis(np.nanmean(arr, axis=1), 0, eje)
+
+
+def figura_superficie(coords, valores, nombres, salida, max_por_eje: int = 100, unidad_energia: str = "kcal"):
+    """
+    Figura Plotly con trazas WebGL: Scattergl (1 eje), Surface (2 ejes) o Isosurface (3 ejes).
+    La malla se reduce antes de enviarla al navegador.
+    """
+    import plotly.graph_objects as go
+    from helpers import energy_unit_convert
+
+    max_por_eje = max_por_eje if len(coords) < 3 else min(max_por_eje, 40)
+    coords, valores = reducir_malla(coords, valores, max_por_eje)
+    valores = energy_unit_convert(valores, "kcal", unidad_energia)
+    etiquetas = [VARIABLES[n][0] for n in nombres]
+    z_label = SALIDAS[salida].replace("kcal", unidad_energia)
+
+    if len(coords) == 1:
+        fig = go.Figure(go.Scattergl(x=coords[0], y=valores, mode="lines", line=dict(color="#19345c")))
+        fig.update_layout(xaxis_title=etiquetas[0], yaxis_title=z_label)
+    elif len(coords) == 2:
+        fig = go.Figure(go.Surface(x=coords[0], y=coords[1], z=valores.T, colorscale="Blues", colorbar=dict(title=z_label)))
+        fig.update_layout(scene=dict(xaxis_title=etiquetas[0], yaxis_title=etiquetas[1], zaxis_title=z_label))
+    else:
+        X, Y, Z = np.meshgrid(*coords, indexing="ij")
+        fig = go.Figure(go.Isosurface(
+            x=X.ravel(), y=Y.ravel(), z=Z.ravel(), value=valores.ravel(),
+            surface_count=6, caps=dict(x_show=False, y_show=False, z_show=False),
+            colorscale="Blues", colorbar=dict(title=z_label),
+        ))
+        fig.update_layout(scene=dict(xaxis_title=etiquetas[0], yaxis_title=etiquetas[1], zaxis_title=etiquetas[2]))
+    fig.update_layout(
+        template="simple_white",
+        font=dict(family="Montserrat, Arial", size=14, color="#19345c"),
+        title=f"Sensibilidad de {z_label}",
+    )
+    return fig
@@ -1,4 +1,6 @@
+import numpy as np
 import pytest
+from models.climate import abrir_registro, deficit_termico_diario
 from models.energy import PigGrowEnergy
 
 def test_me_mto():
@@ -18,3 +20,42 @@ def test_me_growth():
     # 1000g/día, f_P=0.2, f_G=0.1
     res = model.me_growth(1000, 0.2, 0.1, 5.7, 9.5, 0.5, 0.6)
     assert res > 0
+
+def _registro_dia_noche(tmp_path):
+    # 10 días, 24 lecturas/día, 3 granjas: 12 h a 16 °C y 12 h a 26 °C (media 21 °C)
+    dia = np.r_[np.full(12, 16.0), np.full(12, 26.0)]
+    T = np.tile(dia, 10)[:, None] + np.array([0.0, -4.0, 10.0])
+    T[5, 0] = np.nan
+    np.save(tmp_path / "clima.npy", T.astype("float32"))
+    return abrir_registro(str(tmp_path / "clima.npy"))
+
+def test_me_term_registro_noches_frias(tmp_path):
+    params = {"a_cat": 100, "b": 0.75, "s_cat": 20, "TCI_base": 20, "e_P": 5.7, "e_G": 9.5, "k_P": 0.5, "k_G": 0.6}
+    model = PigGrowEnergy(params)
+    res = model.me_term_registro(_registro_dia_noche(tmp_path), muestras_por_dia=24, dias_por_bloque=3)
+    assert res.shape == (10, 3)
+    assert np.allclose(res[1:, 0], 20 * 4 * 12 / 24)
+    assert abs(res[0, 0] - 20 * 4 * 11 / 23) < 1e-9
+    assert np.allclose(res[:, 2], 0)
+    # Con la media diaria (21 °C) la térmica sería 0
+    assert model.me_term(20, 20, 21) == 0
+
+def test_me_total_con_me_term():
+    params = {"a_cat": 100, "b": 0.75, "s_cat": 20, "TCI_base": 20, "e_P": 5.7, "e_G": 9.5, "k_P": 0.5, "k_G": 0.6}
+    model = PigGrowEnergy(params)
+    me_term = np.array([0.0, 40.0, 80.0])
+    total = model.me_total(50, 700, 0.17, 0.15, 21, ME_term=me_term)
+    assert np.allclose(total - model.me_total(50, 700, 0.17, 0.15, 21), me_term)
+
+def test_deficit_dia_final_parcial_y_tci_por_granja():
+    # 2 días completos + 6 lecturas del tercero, 4 lecturas/día, 2 granjas a 15 °C constantes
+    T = np.full((4 * 2 + 2, 2), 15.0)
+    T[-2:, 0] = [10.0, np.nan]
+    res = deficit_termico_diario(T, np.array([20.0, 16.0]), muestras_por_dia=4, dias_por_bloque=2)
+    assert res.shape == (3, 2)
+    assert np.allclose(res[:2], [[5.0, 1.0], [5.0, 1.0]])
+    assert res[2, 0] == pytest.approx(10.0)
+    assert res[2, 1] == pytest.approx(1.0)
+    # Día sin lecturas válidas
+    T[-2:, 1] = np.nan
+    assert np.isnan(deficit_termico_diario(T, 16.0, 4)[2, 1])
@@ -0,0 +1,76 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from core.export import iter_csv_chunks, write_csv, export_buffer
+
+def _df(n=2500):
+    return pd.DataFrame({
+        "dia": np.arange(n),
+        "PV": np.linspace(25, 120, n),
+        "AME_requerida": np.linspace(3300, 2900, n),
+        "nutriente": ["Lys total"] * n,
+    })
+
+def test_csv_por_bloques_igual_a_to_csv():
+    df = _df()
+    bloques = list(iter_csv_chunks(df, chunk_rows=1000))
+    assert len(bloques) == 3
+    assert b"".join(bloques) == df.to_csv(index=False).encode()
+
+def test_csv_desde_iterable_de_frames():
+    df = _df(10)
+    buf = io.BytesIO()
+    write_csv((df.iloc[i:i + 3] for i in range(0, 10, 3)), buf)
+    assert buf.getvalue() == df.to_csv(index=False).encode()
+
+def test_parquet_y_arrow_con_unidades(tmp_path):
+    pytest.importorskip("pyarrow")
+    from core.export import write_parquet, write_arrow_ipc, read_parquet, read_arrow_ipc, unidades_de_schema
+    df = _df()
+    write_parquet(df, str(tmp_path / "r.parquet"), unidades={"nutriente": "-"}, chunk_rows=1000)
+    write_arrow_ipc(df, str(tmp_path / "r.arrow"), chunk_rows=1000)
+    for tabla in [read_parquet(str(tmp_path / "r.parquet")), read_arrow_ipc(str(tmp_path / "r.arrow"))]:
+        pd.testing.assert_frame_equal(tabla.to_pandas(), df)
+        unidades = unidades_de_schema(tabla.schema)
+        assert unidades["PV"] == "kg" and unidades["AME_requerida"] == "kcal/kg"
+    assert unidades_de_schema(read_parquet(str(tmp_path / "r.parquet")).schema)["nutriente"] == "-"
+
+def test_export_buffer_formato_invalido():
+    with pytest.raises(ValueError):
+        export_buffer(_df(3), "XLSX")
+
+def test_parquet_y_arrow_sin_datos(tmp_path):
+    pytest.importorskip("pyarrow")
+    from core.export import write_parquet, write_arrow_ipc
+    for escribir, nombre in [(write_parquet, "r.parquet"), (write_arrow_ipc, "r.arrow")]:
+        with pytest.raises(ValueError):
+            escribir(iter([]), str(tmp_path / nombre))
+
+def test_csv_sin_datos(tmp_path):
+    with pytest.raises(ValueError):
+        write_csv(iter([]), str(tmp_path / "r.csv"))
+    assert not (tmp_path / "r.csv").exists()
+
+def test_bloques_con_tipos_distintos(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    from core.export import write_parquet, read_parquet, unidades_de_schema
+    bloques = [
+        pd.DataFrame({"dia": [0, 1], "PV": [25, 26], "nota": [None, None]}),
+        pd.DataFrame({"dia": [2, 3], "PV": [26.5, 27.5], "nota": ["frío", None]}),
+    ]
+    with pytest.raises(ValueError, match="schema="):
+        write_parquet(iter(bloques), str(tmp_path / "sin.parquet"))
+    schema = pa.schema([("dia", pa.int64()), ("PV", pa.float64()), ("nota", pa.string())])
+    write_parquet(iter(bloques), str(tmp_path / "con.parquet"), schema=schema)
+    tabla = read_parquet(str(tmp_path / "con.parquet"))
+    assert tabla.column("PV").to_pylist() == [25.0, 26.0, 26.5, 27.5]
+    assert tabla.column("nota").to_pylist() == [None, None, "frío", None]
+    assert unidades_de_schema(tabla.schema)["PV"] == "kg"
+
+def test_dataframe_usa_esquema_completo(tmp_path):
+    pytest.importorskip("pyarrow")
+    from core.export import write_arrow_ipc, read_arrow_ipc
+    df = pd.DataFrame({"dia": range(4), "nota": [None, None, None, "calor"]})
+    write_arrow_ipc(df, str(tmp_path / "r.arrow"), chunk_rows=2)
+    assert read_arrow_ipc(str(tmp_path / "r.arrow")).column("nota").to_pylist() == [None, None, None, "calor"]
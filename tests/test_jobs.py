@@ -0,0 +1,67 @@
+import threading
+import time
+from core.jobs import JobManager
+
+def _suma(a, b):
+    return a + b
+
+def _lenta(evento, progreso=None):
+    for i in range(200):
+        evento.wait(0.01)
+        progreso(i / 200, "trabajando")
+    return "fin"
+
+_contador = {"n": 0}
+
+def _contar(x):
+    _contador["n"] += 1
+    time.sleep(0.05)
+    return x
+
+def test_resultado_y_por_usuario():
+    jm = JobManager()
+    job = jm.submit("ana", _suma, 2, 3)
+    assert job.resultado(timeout=5) == 5
+    assert job.estado == "completado" and job.progreso == 1.0
+    assert jm.jobs("ana") == [job] and jm.jobs("luis") == []
+    jm.limpiar("ana")
+    assert jm.jobs("ana") == []
+
+def test_deduplica_calculos_identicos():
+    jm = JobManager()
+    _contador["n"] = 0
+    a = jm.submit("ana", _contar, 7)
+    b = jm.submit("luis", _contar, 7)
+    assert a is b and a.usuarios == {"ana", "luis"}
+    assert b.resultado(timeout=5) == 7 and _contador["n"] == 1
+    assert jm.submit("ana", _contar, 8) is not a
+
+def test_cancelar_tarea_en_curso():
+    jm = JobManager(max_trabajadores=1)
+    evento = threading.Event()
+    job = jm.submit("ana", _lenta, evento)
+    while job.progreso == 0:
+        time.sleep(0.01)
+    assert jm.cancel("ana", job.id)
+    job.future.exception(timeout=5)
+    assert job.estado == "cancelado"
+    assert jm.jobs("ana") == []
+
+def test_cancelar_compartida_no_detiene_al_otro_usuario():
+    jm = JobManager()
+    _contador["n"] = 0
+    job = jm.submit("ana", _contar, 1)
+    jm.submit("luis", _contar, 1)
+    assert not jm.cancel("ana", job.id)
+    assert job.resultado(timeout=5) == 1 and jm.jobs("luis") == [job]
+
+def test_cancelar_compartida_terminada_conserva_al_otro_usuario():
+    jm = JobManager()
+    job = jm.submit("ana", _suma, 4, 5)
+    assert jm.submit("luis", _suma, 4, 5) is job
+    assert job.resultado(timeout=5) == 9
+    assert not jm.cancel("ana", job.id)
+    assert jm.jobs("ana") == [] and jm.jobs("luis") == [job]
+    assert jm.get(job.id) is job and job.estado == "completado"
+    jm.cancel("luis", job.id)
+    assert jm.get(job.id) is None
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+from models.energy import PigGrowEnergy
+from models.phases import MAX_DIAS, etapa_por_pv, curva_diaria, requerimientos_diarios, optimizar_fases
+from models.scale import scale_nutrients, scale_nutrients_matrix
+
+PARAMS = {"a_cat": 100, "b": 0.75, "s_cat": 20, "TCI_base": 20, "e_P": 5.7, "e_G": 9.5, "k_P": 0.5, "k_G": 0.6}
+
+def _plan_base():
+    nutrients_df = pd.read_csv("params/nutrients_requirements.csv")
+    curva = curva_diaria(PigGrowEnergy(PARAMS), 25, 120, 850, 0.17, 0.15, 18, np.linspace(1.3, 3.2, 112))
+    return curva, requerimientos_diarios(curva, nutrients_df)
+
+def test_etapa_por_pv():
+    assert etapa_por_pv(59.9) == "20-60"
+    assert etapa_por_pv(60) == "60-100"
+    assert list(etapa_por_pv([30, 80, 110])) == ["20-60", "60-100", ">100"]
+
+def test_scale_matrix_igual_a_scale_nutrients():
+    nutr = pd.read_csv("params/nutrients_requirements.csv")
+    nutr = nutr[nutr["etapa"] == "60-100"].copy()
+    nutr["escalable"] = nutr["escalable"].astype(str).str.lower().map({"true": True, "false": False})
+    for ame in [2800, 3175, 3600]:
+        esperado = scale_nutrients(nutr, ame)["valor_por_kg"].to_numpy(dtype=float)
+        assert np.allclose(scale_nutrients_matrix(nutr, [ame])[0], esperado)
+
+def test_fases_cubren_todos_los_dias_sin_deficit():
+    curva, req = _plan_base()
+    plan = optimizar_fases(curva, req, max_fases=4, min_dias=10, costo_fase=1.0)
+    fases = plan["fases"]
+    assert 1 <= plan["n_fases"] <= 4
+    assert fases["dia_inicio"].iloc[0] == 0 and fases["dia_fin"].iloc[-1] == len(curva) - 1
+    assert (fases["dia_inicio"].iloc[1:].to_numpy() == fases["dia_fin"].iloc[:-1].to_numpy() + 1).all()
+    assert (fases["dias"] >= 10).all()
+    for _, f in fases.iterrows():
+        dias = req.iloc[int(f["dia_inicio"]):int(f["dia_fin"]) + 1]
+        assert (f[req.columns].fillna(0) >= dias.max().fillna(0) - 1e-9).all()
+
+def test_penalizacion_reduce_fases():
+    curva, req = _plan_base()
+    sin_costo = optimizar_fases(curva, req, max_fases=len(curva), min_dias=1)
+    assert sin_costo["exceso"] < 1e-6
+    caro = optimizar_fases(curva, req, max_fases=6, costo_fase=1e9)
+    assert caro["n_fases"] == 1
+
+def test_curva_larga_y_limite_de_dias():
+    nutrients_df = pd.read_csv("params/nutrients_requirements.csv")
+    modelo = PigGrowEnergy(PARAMS)
+    curva = curva_diaria(modelo, 25, 120, 100, 0.17, 0.15, 18, 2.4)
+    assert len(curva) == MAX_DIAS - 50
+    plan = optimizar_fases(curva, requerimientos_diarios(curva, nutrients_df), max_fases=4, costo_fase=1.0)
+    assert plan["fases"]["dias"].sum() == len(curva)
+    larga = curva_diaria(modelo, 50, 120, 20, 0.17, 0.15, 18, 2.4)
+    with pytest.raises(ValueError):
+        optimizar_fases(larga, requerimientos_diarios(larga, nutrients_df))
+
+def test_curva_rechaza_me_term_sin_dato():
+    me_term = np.full(112, 50.0)
+    me_term[50:60] = np.nan
+    with pytest.raises(ValueError):
+        curva_diaria(PigGrowEnergy(PARAMS), 25, 120, 850, 0.17, 0.15, 18, 2.4, ME_term=me_term)
+
+def test_me_term_alineado_con_dia_inicio():
+    modelo = PigGrowEnergy(PARAMS)
+    registro = np.arange(365, dtype=float)  # ME_term distinto cada día del año
+    base = curva_diaria(modelo, 25, 120, 850, 0.17, 0.15, 18, 2.4, ME_term=np.zeros(112))
+    curva = curva_diaria(modelo, 25, 120, 850, 0.17, 0.15, 18, 2.4, ME_term=registro, dia_inicio=200)
+    assert np.allclose(curva["ME_total"] - base["ME_total"], registro[200:312])
+    # Serie más larga que el lote sin dia_inicio, o que no cubre el lote: error
+    with pytest.raises(ValueError):
+        curva_diaria(modelo, 25, 120, 850, 0.17, 0.15, 18, 2.4, ME_term=registro)
+    with pytest.raises(ValueError):
+        curva_diaria(modelo, 25, 120, 850, 0.17, 0.15, 18, 2.4, ME_term=registro, dia_inicio=300)
+
+def test_costo_pienso_solo_con_precios():
+    curva, req = _plan_base()
+    assert optimizar_fases(curva, req, max_fases=3)["costo_pienso"] is None
+    precios = {"Lys digest. std.": 2.0, "Proteína bruta": 0.1}
+    plan = optimizar_fases(curva, req, max_fases=3, precios=precios)
+    esperado = sum(
+        f["FI_total"] * sum(f[n] * p for n, p in precios.items())
+        for _, f in plan["fases"].iterrows()
+    )
+    assert plan["costo_pienso"] == pytest.approx(esperado)
+    minimo = (curva["FI"] * sum(req[n] * p for n, p in precios.items())).sum()
+    assert plan["exceso"] == pytest.approx(plan["costo_pienso"] - minimo)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from models.energy import PigGrowEnergy
+from models.sensitivity import superficie, reducir_malla, figura_superficie
+
+PARAMS = {"a_cat": 100, "b": 0.75, "s_cat": 20, "TCI_base": 20, "e_P": 5.7, "e_G": 9.5, "k_P": 0.5, "k_G": 0.6}
+FIJOS = dict(PV=50, ADG=700, f_P=0.17, f_G=0.15, T_amb=20, FI=2.2)
+
+def test_superficie_coincide_con_modelo():
+    coords, z = superficie(PARAMS, [("FI", 1, 4, 31), ("T_amb", 0, 35, 36)], FIJOS)
+    assert z.shape == (31, 36)
+    modelo = PigGrowEnergy(PARAMS)
+    i, j = 7, 5
+    esperado = modelo.me_total(50, 700, 0.17, 0.15, coords[1][j]) / coords[0][i]
+    assert z[i, j] == pytest.approx(esperado)
+
+def test_superficie_cacheada_y_solo_lectura():
+    ejes = [("PV", 20, 130, 50), ("ADG", 300, 1200, 40)]
+    a = superficie(PARAMS, ejes, FIJOS, "ME_total")
+    b = superficie(dict(PARAMS), list(ejes), dict(FIJOS), "ME_total")
+    assert a is b
+    assert not a[1].flags.writeable
+
+def test_reducir_malla():
+    coords = [np.arange(250.0), np.arange(10.0)]
+    z = coords[0][:, None] + coords[1][None, :]
+    c, zr = reducir_malla(coords, z, max_por_eje=100)
+    assert zr.shape == (84, 10) and len(c[0]) == 84
+    assert zr[0, 0] == pytest.approx(1.0)
+
+def test_figura_webgl():
+    pytest.importorskip("plotly")
+    coords, z = superficie(PARAMS, [("FI", 1, 4, 300), ("T_amb", 0, 35, 300)], FIJOS)
+    fig = figura_superficie(coords, z, ["FI", "T_amb"], "AME_requerida")
+    assert fig.data[0].type == "surface"
+    assert np.asarray(fig.data[0].z).shape == (100, 100)
+
+def test_cache_ignora_valor_fijo_de_los_ejes():
+    ejes = [("FI", 1, 4, 25), ("T_amb", 0, 35, 25)]
+    a = superficie(PARAMS, ejes, FIJOS)
+    b = superficie(PARAMS, ejes, {**FIJOS, "FI": 3.1, "T_amb": 12})
+    assert a is b
+    assert superficie(PARAMS, ejes, {**FIJOS, "PV": 80}) is not a